@@ -3,6 +3,9 @@ import sys
 import re
 import json
 import time
+import posixpath
+import threading
+import itertools
 import concurrent.futures
 from urllib.parse import urlparse, urljoin, unquote
 from pathlib import Path
@@ -10,15 +13,95 @@ from collections import defaultdict, Counter
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     from bs4 import BeautifulSoup
     from colorama import init, Fore, Style
 except ImportError:
-    print("Missing dependencies. Please run: pip install beautifulsoup4 requests colorama")
+    print("Missing dependencies. Please run: pip install beautifulsoup4 lxml requests colorama")
     sys.exit(1)
 
 # Initialize colorama
 init(autoreset=True)
 
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+PARSER = 'lxml' if etree is not None else 'html.parser'
+BREADCRUMB_RE = re.compile("breadcrumb", re.I)
+
+# Link issues are counted per (file, type) and only formatted for the report
+LINK_ISSUE_MESSAGES = {
+    'absolute_url': "Internal link using absolute URL (should be relative or root-relative)",
+    'html_extension': "Link contains .html extension (should use Clean URL)",
+    'relative_path': "Relative path used (recommend starting with /)",
+    'missing_nofollow': "External link missing 'nofollow' (risk of link juice leakage)",
+}
+
+class PageTarget:
+    """lxml parser target that collects audit data from start tags without building a tree"""
+    def __init__(self):
+        self.h1_count = 0
+        self.has_schema = False
+        self.has_breadcrumb = False
+        self.hrefs = []
+
+    def start(self, tag, attrib):
+        if tag == 'h1':
+            self.h1_count += 1
+        elif tag == 'script' and attrib.get('type') == 'application/ld+json':
+            self.has_schema = True
+        elif tag == 'a' and 'href' in attrib:
+            self.hrefs.append((attrib['href'].strip(), attrib.get('rel', '').split()))
+
+        # Check for aria-label="breadcrumb" or class="breadcrumb"
+        if not self.has_breadcrumb:
+            if attrib.get('aria-label') == 'breadcrumb' or BREADCRUMB_RE.search(attrib.get('class', '')):
+                self.has_breadcrumb = True
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return {
+            'h1_count': self.h1_count,
+            'has_schema': self.has_schema,
+            'has_breadcrumb': self.has_breadcrumb,
+            'hrefs': self.hrefs
+        }
+
+def parse_page(content, rel_path):
+    """Parse the raw bytes of a single HTML file and return the data needed for the audit.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+    """
+    if etree is not None:
+        parser = etree.HTMLParser(target=PageTarget(), encoding='utf-8')
+        parser.feed(content)
+        page = parser.close()
+    else:
+        page = parse_page_bs4(content)
+
+    page['rel_path'] = rel_path
+    return page
+
+def parse_page_bs4(content):
+    """Fallback for parse_page when lxml is not installed"""
+    soup = BeautifulSoup(content, PARSER, from_encoding='utf-8')
+
+    # One walk over every tag, classified by the same target the lxml path uses
+    target = PageTarget()
+    for tag in soup.find_all(True):
+        # bs4 splits multi-valued attributes (class, rel) into lists
+        attrib = {k: ' '.join(v) if isinstance(v, list) else v for k, v in tag.attrs.items()}
+        target.start(tag.name, attrib)
+    return target.close()
+
 class Config:
     def __init__(self):
         self.root_dir = Path.cwd()
@@ -28,18 +111,20 @@ class Config:
         self.ignore_url_prefixes = ('/go/', '/cdn-cgi/', 'javascript:', 'mailto:', 'tel:', '#')
         self.ignore_files_contain = ['google', '404.html']
         self.external_links = set()
-        self.internal_pages = {} # path -> {title, h1_count, has_schema, has_breadcrumb, links, inbound_count}
+        self.internal_pages = {} # relative_path_str -> {title, h1_count, has_schema, has_breadcrumb, links, inbound_count}
         self.file_mapping = {} # relative_path_str -> absolute_path
+        self.existing_files = set() # relative_path_str of every file in the tree (pages and assets)
         self.dead_links = [] # (source, href)
         self.warnings = [] # (source, message)
+        self.link_issues = Counter() # (source, issue_type) -> occurrences
         self.score = 100
 
     def detect_config(self):
         index_path = self.root_dir / 'index.html'
         if index_path.exists():
             try:
-                with open(index_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    soup = BeautifulSoup(f, 'html.parser')
+                with open(index_path, 'rb') as f:
+                    soup = BeautifulSoup(f.read(), PARSER, from_encoding='utf-8')
                     
                     # Detect Base URL
                     canonical = soup.find('link', rel='canonical')
@@ -64,12 +149,7 @@ class Auditor:
         self.config = Config()
         self.config.detect_config()
         self.files_to_scan = []
-
-    def is_ignored_path(self, path):
-        for part in path.parts:
-            if part in self.config.ignore_paths:
-                return True
-        return False
+        self._link_resolution_cache = {} # href or (source_dir, href) -> (found, target_rel_path)
 
     def is_ignored_file(self, filename):
         for keyword in self.config.ignore_files_contain:
@@ -79,28 +159,38 @@ class Auditor:
 
     def scan_files(self):
         print(f"{Fore.CYAN}[INFO] Scanning files in {self.config.root_dir}...")
-        for root, dirs, files in os.walk(self.config.root_dir):
-            # Modify dirs in-place to skip ignored directories
-            dirs[:] = [d for d in dirs if d not in self.config.ignore_paths]
-            
-            for file in files:
-                if not file.endswith('.html'):
+        self._scan(str(self.config.root_dir), ())
+
+    def _scan(self, dirpath, rel_parts):
+        # DirEntry caches the file type, so no extra stat per entry
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    # Skip ignored directories
+                    if entry.name not in self.config.ignore_paths:
+                        self._scan(entry.path, rel_parts + (entry.name,))
                     continue
-                if self.is_ignored_file(file):
+
+                if not entry.is_file():
                     continue
-                
-                file_path = Path(root) / file
-                if self.is_ignored_path(file_path):
+
+                # Every file is a valid link target, even ones we don't audit
+                rel_path = '/'.join(rel_parts + (entry.name,))
+                self.config.existing_files.add(rel_path)
+
+                if not entry.name.endswith('.html'):
                     continue
-                
+                if self.is_ignored_file(entry.name):
+                    continue
+
+                file_path = entry.path
                 self.files_to_scan.append(file_path)
                 # Map relative path to absolute path for resolution
-                rel_path = file_path.relative_to(self.config.root_dir)
-                self.config.file_mapping[str(rel_path)] = file_path
+                self.config.file_mapping[rel_path] = file_path
                 
                 # Initialize page data
-                self.config.internal_pages[str(file_path)] = {
-                    'rel_path': str(rel_path),
+                self.config.internal_pages[rel_path] = {
+                    'rel_path': rel_path,
                     'h1_count': 0,
                     'has_schema': False,
                     'has_breadcrumb': False,
@@ -108,125 +198,145 @@ class Auditor:
                     'inbound_count': 0
                 }
 
-    def check_link_resolution(self, source_file, href, link_element=None):
+    def check_link_resolution(self, source_rel, href, rel=None):
         # 1. Check ignore list
         if href.startswith(self.config.ignore_url_prefixes):
             return
 
-        # 2. External Links
-        parsed = urlparse(href)
-        if parsed.scheme in ('http', 'https'):
-            # Check if it matches our base URL (internal link disguised as absolute)
-            if self.config.base_url and href.startswith(self.config.base_url):
-                # Treat as internal, strip domain
-                path = href[len(self.config.base_url):]
-                if not path: path = "/"
-                self.check_internal_link(source_file, path, is_absolute_url=True)
-            else:
-                self.config.external_links.add(href)
-                # Check for nofollow on external links to prevent link juice leakage
-                if link_element:
-                    rel = link_element.get('rel', [])
-                    # Ensure rel is a list (BeautifulSoup usually returns list for rel, but safety first)
-                    if isinstance(rel, str):
-                        rel = rel.split()
-                    
-                    if 'nofollow' not in rel:
-                        self.config.warnings.append((str(source_file.relative_to(self.config.root_dir)), 
-                                                   f"External link missing 'nofollow': {href} (risk of link juice leakage)"))
-                        self.config.score -= 2
+        # 2. External Links (a prefix check is enough, no need to urlparse every href)
+        if href[:8].lower().startswith(('http://', 'https://')):
+            self.check_absolute_link(source_rel, href, rel)
+            return
+        if href.startswith('//'):
+            # Protocol-relative: //host/path
+            self.check_absolute_link(source_rel, 'https:' + href, rel)
             return
 
         # 3. Internal Links
-        self.check_internal_link(source_file, href)
+        self.check_internal_link(source_rel, href)
+
+    def check_absolute_link(self, source_rel, href, rel=None):
+        # Check if it matches our base URL (internal link disguised as absolute)
+        if self.config.base_url and href.startswith(self.config.base_url):
+            # Treat as internal, strip domain
+            path = href[len(self.config.base_url):]
+            if not path: path = "/"
+            self.check_internal_link(source_rel, path, is_absolute_url=True)
+        else:
+            self.config.external_links.add(href)
+            # Check for nofollow on external links to prevent link juice leakage
+            if rel is not None:
+                if 'nofollow' not in rel:
+                    self.config.link_issues[(source_rel, 'missing_nofollow')] += 1
+                    self.config.score -= 2
 
-    def check_internal_link(self, source_file, href, is_absolute_url=False):
+    def check_internal_link(self, source_rel, href, is_absolute_url=False):
         # Remove query params and hash
         href_clean = href.split('#')[0].split('?')[0]
         if not href_clean:
             return
 
+        issues = []
+
         # Warning: Absolute URL for internal link
         if is_absolute_url:
-            self.config.warnings.append((str(source_file.relative_to(self.config.root_dir)), 
-                                       f"Internal link using absolute URL: {href} (should be relative or root-relative)"))
-            self.config.score -= 2
+            issues.append('absolute_url')
 
         # Warning: .html extension
         if href_clean.endswith('.html') or href_clean.endswith('.htm'):
-             self.config.warnings.append((str(source_file.relative_to(self.config.root_dir)), 
-                                        f"Link contains .html extension: {href} (should use Clean URL)"))
-             self.config.score -= 2
+            issues.append('html_extension')
         
         # Warning: Relative path usage (preference for root-relative /)
         if not href.startswith('/') and not is_absolute_url:
-             self.config.warnings.append((str(source_file.relative_to(self.config.root_dir)), 
-                                        f"Relative path used: {href} (recommend starting with /)"))
-             self.config.score -= 2
+            issues.append('relative_path')
+
+        if issues:
+            self.config.link_issues.update((source_rel, issue) for issue in issues)
+            self.config.score -= 2 * len(issues)
 
         # Resolution Logic
-        target_found = False
-        
-        # Determine potential file paths
-        potential_paths = []
+        target_found, target_file = self.resolve_internal_link(source_rel, href_clean)
         
+        if target_found:
+            # Add to graph
+            if target_file in self.config.internal_pages:
+                self.config.internal_pages[target_file]['inbound_count'] += 1
+        else:
+            self.config.dead_links.append((source_rel, href))
+            self.config.score -= 10
+
+    def resolve_internal_link(self, source_rel, href_clean):
+        # Nav/footer links repeat on every page, so memoize resolution.
+        # Root-relative links resolve the same everywhere; relative ones depend on the source dir.
+        if href_clean.startswith('/'):
+            key = href_clean
+        else:
+            source_dir = posixpath.dirname(source_rel)
+            key = (source_dir, href_clean)
+
+        cached = self._link_resolution_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Determine potential file paths (relative to root, as stored in existing_files)
         if href_clean.startswith('/'):
             # Root relative
-            path_part = href_clean.lstrip('/')
-            # Case 1: /blog/post -> root/blog/post.html
-            potential_paths.append(self.config.root_dir / f"{path_part}.html")
-            # Case 2: /blog/post -> root/blog/post/index.html
-            potential_paths.append(self.config.root_dir / path_part / "index.html")
-            # Case 3: exact match (if it refers to a file like image or existing html)
-            potential_paths.append(self.config.root_dir / path_part)
+            base = href_clean.lstrip('/')
         else:
             # Relative to current file
-            parent_dir = source_file.parent
-            # Case 1: blog/post -> parent/blog/post.html
-            potential_paths.append(parent_dir / f"{href_clean}.html")
-            # Case 2: blog/post -> parent/blog/post/index.html
-            potential_paths.append(parent_dir / href_clean / "index.html")
-            # Case 3: exact match
-            potential_paths.append(parent_dir / href_clean)
-
-        target_file = None
+            base = posixpath.join(source_dir, href_clean)
+
+        potential_paths = (
+            # Case 1: blog/post -> blog/post.html
+            f"{base}.html",
+            # Case 2: blog/post -> blog/post/index.html
+            posixpath.join(base, "index.html"),
+            # Case 3: exact match (if it refers to a file like image or existing html)
+            base,
+        )
+
+        result = (False, None)
         for p in potential_paths:
-            if p.exists() and p.is_file():
-                target_found = True
-                target_file = p
+            p = posixpath.normpath(p)
+            if p in self.config.existing_files:
+                result = (True, p)
                 break
-        
-        if target_found:
-            # Add to graph
-            if str(target_file) in self.config.internal_pages:
-                self.config.internal_pages[str(target_file)]['inbound_count'] += 1
-        else:
-            self.config.dead_links.append((str(source_file.relative_to(self.config.root_dir)), href))
-            self.config.score -= 10
+
+        self._link_resolution_cache[key] = result
+        return result
 
     def parse_content(self):
         print(f"{Fore.CYAN}[INFO] Parsing {len(self.files_to_scan)} files...")
-        for file_path in self.files_to_scan:
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    soup = BeautifulSoup(content, 'html.parser')
-                    
-                    page_data = self.config.internal_pages[str(file_path)]
+        # Reads overlap in threads, parsing is CPU-bound so it is spread across processes;
+        # link checks stay serial
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as readers, \
+             concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            reads = [(rel_path, file_path, readers.submit(Path(file_path).read_bytes))
+                     for rel_path, file_path in self.config.file_mapping.items()]
+
+            futures = []
+            for rel_path, file_path, read in reads:
+                try:
+                    futures.append((file_path, executor.submit(parse_page, read.result(), rel_path)))
+                except OSError as e:
+                    print(f"{Fore.RED}[ERROR] Processing file {file_path}: {e}")
+
+            for file_path, future in futures:
+                try:
+                    result = future.result()
+                    page_data = self.config.internal_pages[result['rel_path']]
                     
                     # H1 Check
-                    h1s = soup.find_all('h1')
-                    page_data['h1_count'] = len(h1s)
-                    if len(h1s) == 0:
+                    page_data['h1_count'] = result['h1_count']
+                    if result['h1_count'] == 0:
                         self.config.warnings.append((page_data['rel_path'], "Missing H1 tag"))
                         self.config.score -= 5
-                    elif len(h1s) > 1:
+                    elif result['h1_count'] > 1:
                         self.config.warnings.append((page_data['rel_path'], "Multiple H1 tags found"))
                         # Multiple H1 is less critical than missing, usually not penalized heavily in modern SEO but good to note
                     
                     # Schema Check
-                    schemas = soup.find_all('script', type='application/ld+json')
-                    if schemas:
+                    if result['has_schema']:
                         page_data['has_schema'] = True
                     else:
                         self.config.warnings.append((page_data['rel_path'], "Missing Schema (application/ld+json)"))
@@ -234,18 +344,15 @@ class Auditor:
                         
                     # Breadcrumb Check
                     # Check for aria-label="breadcrumb" or class="breadcrumb"
-                    has_breadcrumb = False
-                    if soup.find(attrs={"aria-label": "breadcrumb"}) or soup.find(class_=re.compile("breadcrumb", re.I)):
-                        has_breadcrumb = True
-                    page_data['has_breadcrumb'] = has_breadcrumb
+                    page_data['has_breadcrumb'] = result['has_breadcrumb']
                     
                     # Extract Links
-                    for a in soup.find_all('a', href=True):
-                        href = a['href'].strip()
-                        self.check_link_resolution(file_path, href, link_element=a)
+                    # The page's relative path comes from the scan, so it is never recomputed per link
+                    for href, rel in result['hrefs']:
+                        self.check_link_resolution(page_data['rel_path'], href, rel=rel)
                         
-            except Exception as e:
-                print(f"{Fore.RED}[ERROR] Processing file {file_path}: {e}")
+                except Exception as e:
+                    print(f"{Fore.RED}[ERROR] Processing file {file_path}: {e}")
 
     def check_external_links_async(self):
         links = list(self.config.external_links)
@@ -253,22 +360,52 @@ class Auditor:
             return
 
         print(f"{Fore.CYAN}[INFO] Checking {len(links)} external links (Async)...")
+        max_workers = 32
+        per_host_limit = 2
+        max_host_errors = 2
+
+        # Bucket by host so one slow server can't take over the whole pool
+        by_host = defaultdict(list)
+        for url in links:
+            by_host[urlparse(url).netloc].append(url)
+        host_slots = {host: threading.Semaphore(per_host_limit) for host in by_host}
+        host_errors = Counter()
+        errors_lock = threading.Lock()
+
+        # Share one connection pool so repeated hosts reuse keep-alive connections
+        session = requests.Session()
+        session.headers['User-Agent'] = 'SEOAuditBot/1.0'
+        retry = Retry(total=1, backoff_factor=0.2, status_forcelist=[429, 502, 503], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=max_workers, max_retries=retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
         
         def check_url(url):
-            try:
-                headers = {'User-Agent': 'SEOAuditBot/1.0'}
-                response = requests.head(url, headers=headers, timeout=5, allow_redirects=True)
-                if response.status_code >= 400:
-                    # Retry with GET just in case HEAD is blocked
-                    response = requests.get(url, headers=headers, timeout=5, stream=True)
+            host = urlparse(url).netloc
+            with host_slots[host]:
+                # Hosts that keep failing to connect are assumed down
+                if host_errors[host] >= max_host_errors:
+                    return url, 0
+                try:
+                    response = session.head(url, timeout=5, allow_redirects=True)
                     if response.status_code >= 400:
-                        return url, response.status_code
-                return url, 200
-            except Exception:
-                return url, 0 # Connection error
+                        # Retry with GET just in case HEAD is blocked
+                        with session.get(url, timeout=5, stream=True) as response:
+                            if response.status_code >= 400:
+                                return url, response.status_code
+                    return url, 200
+                except Exception:
+                    with errors_lock:
+                        host_errors[host] += 1
+                    return url, 0 # Connection error
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_url = {executor.submit(check_url, url): url for url in links}
+        # Interleave hosts so workers don't queue up behind a single host's semaphore
+        ordered = []
+        for batch in itertools.zip_longest(*by_host.values()):
+            ordered.extend(url for url in batch if url is not None)
+
+        with session, concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_url = {executor.submit(check_url, url): url for url in ordered}
             for future in concurrent.futures.as_completed(future_to_url):
                 url, status = future.result()
                 if status >= 400 or status == 0:
@@ -314,15 +451,20 @@ class Auditor:
             print(f"\n{Fore.GREEN}[SUCCESS] No dead links found.")
 
         # 2. Warnings (Semantics, URL structure, Orphans)
-        if self.config.warnings:
-            print(f"\n{Fore.YELLOW}[WARN] Issues Found ({len(self.config.warnings)}):")
-            # Group by type to make it cleaner? For now just list
+        warnings = list(self.config.warnings)
+        for (source, issue), count in self.config.link_issues.items():
+            warnings.append((source, f"{LINK_ISSUE_MESSAGES[issue]} [{count}x]"))
+        # Group by file to make it cleaner
+        warnings.sort(key=lambda x: x[0])
+
+        if warnings:
+            print(f"\n{Fore.YELLOW}[WARN] Issues Found ({len(warnings)}):")
             # Limit output if too many
             limit = 20
-            for source, msg in self.config.warnings[:limit]:
+            for source, msg in warnings[:limit]:
                 print(f"  - {source}: {msg}")
-            if len(self.config.warnings) > limit:
-                print(f"  ... and {len(self.config.warnings) - limit} more warnings.")
+            if len(warnings) > limit:
+                print(f"  ... and {len(warnings) - limit} more warnings.")
         else:
             print(f"\n{Fore.GREEN}[SUCCESS] No warnings found.")
 
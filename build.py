@@ -1,7 +1,69 @@
 import os
 import re
 import json
-from bs4 import BeautifulSoup, Comment
+import html
+import hashlib
+import random
+import datetime
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from operator import itemgetter
+from bs4 import BeautifulSoup
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Prefer the C-backed lxml parser, fall back to the stdlib one
+PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+TITLE_RE = re.compile(rb'<title[^>]*>(.*?)</title>', re.S | re.I)
+DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+HTML_SUFFIX = '.html'
+SITEMAP_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+SITEMAP_URL = (
+    '    <url>\n'
+    '        <loc>{loc}</loc>\n'
+    '        <lastmod>{lastmod}</lastmod>\n'
+    '        <changefreq>{changefreq}</changefreq>\n'
+    '        <priority>{priority}</priority>\n'
+    '    </url>\n'
+)
+
+def dump_json(obj):
+    """Serialize JSON-LD compactly, with orjson when it is installed"""
+    if orjson:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+def parse_html(data):
+    """Parse page bytes with PARSER, retrying with html.parser if lxml fails on a file"""
+    try:
+        return BeautifulSoup(data, PARSER, from_encoding='utf-8')
+    except Exception:
+        if PARSER == 'html.parser':
+            raise
+        return BeautifulSoup(data, 'html.parser', from_encoding='utf-8')
+
+@dataclass
+class BuildContext:
+    """Read-only state a worker process needs to render a blog post"""
+    root_dir: str
+    nav_str: str
+    footer_str: str
+    assets_html: str
+    blog_titles: dict
+
+def _seed_worker():
+    # Forked workers inherit the parent's RNG state; reseed so recommendations differ
+    random.seed()
+
+def _process_post(file_path, filename, ctx):
+    """Worker entry point: render one blog post and return its metadata for the index"""
+    builder = SiteBuilder.from_context(ctx)
+    builder._process_single_file(file_path, filename, section='blog')
+    return builder.blog_posts.get(filename)
 
 class SiteBuilder:
     def __init__(self, root_dir):
@@ -10,19 +72,44 @@ class SiteBuilder:
         self.blog_dir = os.path.join(root_dir, 'blog')
         self.legal_dir = os.path.join(root_dir, 'legal')
         self.source_soup = None
+        self.source_bytes = None
         self.nav_html = None
         self.footer_html = None
+        self.nav_str = None
+        self.footer_str = None
         self.favicons = []
         self.common_styles_scripts = []
-        self.blog_posts = []
+        self.assets_html = ''
+        self.blog_posts = {} # filename -> {title, description, date, url}
+        self.sorted_posts = [] # blog_posts values, newest first
+        self.blog_titles = {} # filename -> title, used for recommendations
+        self.blog_files = [] # (path, filename) of every blog page, scanned once per build
+        self.legal_files = [] # (path, filename) of every legal page
+        self.cache_path = os.path.join(root_dir, '.build_cache.json')
+        self.cache = {} # rel path -> {key, meta} from the previous build
+        self.new_cache = {} # entries for files seen this build
+        self.shared_digest = ''
         
+    @classmethod
+    def from_context(cls, ctx):
+        builder = cls(ctx.root_dir)
+        builder.nav_str = ctx.nav_str
+        builder.footer_str = ctx.footer_str
+        builder.assets_html = ctx.assets_html
+        builder.blog_titles = ctx.blog_titles
+        return builder
+
+    def context(self):
+        return BuildContext(self.root_dir, self.nav_str, self.footer_str, self.assets_html, self.blog_titles)
+
     def load_source(self):
         """Phase 1: Load and parse index.html as single source of truth"""
         if not os.path.exists(self.index_path):
             raise FileNotFoundError(f"Source file not found: {self.index_path}")
             
-        with open(self.index_path, 'r', encoding='utf-8') as f:
-            self.source_soup = BeautifulSoup(f.read(), 'html.parser')
+        with open(self.index_path, 'rb') as f:
+            self.source_bytes = f.read()
+        self.source_soup = parse_html(self.source_bytes)
             
         print(f"Loaded source: {self.index_path}")
         self._extract_assets()
@@ -33,16 +120,17 @@ class SiteBuilder:
         nav = self.source_soup.find('nav')
         if nav:
             self._clean_links(nav)
-            self._fix_anchor_links(nav)
             self.nav_html = nav
+            # Serialize once; each page re-parses this small fragment instead of copying the tree
+            self.nav_str = str(nav)
             print("Extracted Navigation")
             
         # 2. Extract Footer
         footer = self.source_soup.find('footer')
         if footer:
             self._clean_links(footer)
-            self._fix_anchor_links(footer)
             self.footer_html = footer
+            self.footer_str = str(footer)
             print("Extracted Footer")
             
         # 3. Extract Favicons
@@ -72,6 +160,10 @@ class SiteBuilder:
                 # Skip title, meta, canonical, icons
                 if tag.name == 'link' and ('icon' in str(tag.get('rel')).lower() or tag.get('rel') == ['canonical']):
                     continue
+                # Skip hreflang alternates: the head template emits them per page, and copying them
+                # from the built index.html made every build append another set
+                if tag.name == 'link' and tag.get('hreflang'):
+                    continue
                 if tag.name == 'meta':
                     continue
                 if tag.name == 'title':
@@ -84,15 +176,17 @@ class SiteBuilder:
                 # Keep external resources and inline configs
                 self.common_styles_scripts.append(tag)
 
-    def _fix_anchor_links(self, element):
-        """Convert in-page anchors (#id) to root-relative anchors (/#id) for global nav/footer"""
-        for a in element.find_all('a', href=True):
-            href = a['href']
-            if href.startswith('#'):
-                a['href'] = '/' + href
+        # Pre-render the shared favicon/resource block spliced into every head
+        parts = ['<!-- Favicons -->\n    ']
+        parts.extend(f'{icon}\n    ' for icon in self.favicons)
+        parts.append('<!-- Resources -->\n    ')
+        parts.extend(f'{res}\n    ' for res in self.common_styles_scripts)
+        parts.append('\n')
+        self.assets_html = ''.join(parts)
 
     def _clean_links(self, element):
-        """Remove .html suffix from internal links and add security attributes to external links"""
+        """Remove .html suffix from internal links, add security attributes to external links
+        and convert in-page anchors (#id) to root-relative anchors (/#id), in a single pass"""
         for a in element.find_all('a', href=True):
             href = a['href']
             
@@ -111,13 +205,18 @@ class SiteBuilder:
                     a['rel'] = rel
                 continue
 
-            # Skip anchors and mailto
-            if href.startswith('#') or href.startswith('mailto:'):
+            # Anchors work site-wide once root-relative (global nav/footer)
+            if href.startswith('#'):
+                a['href'] = '/' + href
+                continue
+
+            # Skip mailto
+            if href.startswith('mailto:'):
                 continue
             
             # Remove .html extension
-            if href.endswith('.html'):
-                a['href'] = href[:-5]
+            if href.endswith(HTML_SUFFIX):
+                a['href'] = href[:-len(HTML_SUFFIX)]
                 if not a['href']: # handle .html -> empty string
                      a['href'] = '/'
             
@@ -125,178 +224,288 @@ class SiteBuilder:
             # (Logic can be adjusted if relative links are preferred, but instructions imply standardization)
             # The instruction says "Force root relative path" for favicons, implied for others for consistency
 
+    @staticmethod
+    def _iter_html(dirpath):
+        """Yield (path, filename) for each HTML file in dirpath; DirEntry caches the file type"""
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                if entry.name.endswith(HTML_SUFFIX) and entry.is_file():
+                    yield entry.path, entry.name
+
+    def _scan_dirs(self):
+        """List the blog and legal directories once; every later phase reads these lists"""
+        if os.path.exists(self.blog_dir):
+            self.blog_files = list(self._iter_html(self.blog_dir))
+        if os.path.exists(self.legal_dir):
+            self.legal_files = list(self._iter_html(self.legal_dir))
+
+    def _load_cache(self):
+        """Load the previous build's cache and digest the inputs every page shares"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+        # Layout, assets and recommendation titles go into every page, and so does this script
+        h = hashlib.blake2b(digest_size=16)
+        for part in (self.nav_str or '', self.footer_str or '', self.assets_html,
+                     json.dumps(self.blog_titles, ensure_ascii=False)):
+            h.update(part.encode('utf-8'))
+            h.update(b'\0')
+        with open(__file__, 'rb') as f:
+            h.update(f.read())
+        self.shared_digest = h.hexdigest()
+
+    def _save_cache(self):
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(self.new_cache, f, ensure_ascii=False)
+
+    def _cache_key(self, file_path, extra=''):
+        st = os.stat(file_path)
+        return [st.st_mtime_ns, st.st_size, self.shared_digest + extra]
+
+    def _rel(self, file_path):
+        return os.path.relpath(file_path, self.root_dir).replace(os.sep, '/')
+
+    def _is_fresh(self, file_path, extra=''):
+        """True if file_path is unchanged since the last build wrote it (carries its entry over)"""
+        rel = self._rel(file_path)
+        entry = self.cache.get(rel)
+        if not entry:
+            return False
+        try:
+            key = self._cache_key(file_path, extra)
+        except OSError:
+            return False
+        if entry.get('key') != key:
+            return False
+        self.new_cache[rel] = entry
+        return True
+
+    def _record(self, file_path, extra='', meta=None):
+        """Remember the state of a file just written so the next build can skip it"""
+        entry = {'key': self._cache_key(file_path, extra)}
+        if meta:
+            entry['meta'] = meta
+        self.new_cache[self._rel(file_path)] = entry
+
     def process_all_pages(self):
         """Process blog, legal, and index pages"""
         # 1. Process Blog Directory
-        if os.path.exists(self.blog_dir):
-            all_files = [f for f in os.listdir(self.blog_dir) if f.endswith('.html')]
-            blog_index = 'index.html'
-            posts = [f for f in all_files if f != blog_index]
-            
-            # Process posts first to collect metadata
-            for filename in posts:
-                file_path = os.path.join(self.blog_dir, filename)
-                self._process_single_file(file_path, filename, section='blog')
+        if self.blog_files:
+            blog_index = None
+            posts = []
+            for file_path, filename in self.blog_files:
+                if filename == 'index.html':
+                    blog_index = file_path
+                elif self._is_fresh(file_path):
+                    # Unchanged since the last build: reuse its metadata for the index
+                    print(f"Skipping [blog]: {filename} (unchanged)")
+                    meta = self.new_cache[self._rel(file_path)].get('meta')
+                    if meta:
+                        self.blog_posts[filename] = meta
+                else:
+                    posts.append((file_path, filename))
+
+            # Process posts first, in parallel, and collect their metadata back here
+            if posts:
+                paths, names = zip(*posts)
+                ctx = self.context()
+                with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_seed_worker) as pool:
+                    results = pool.map(_process_post, paths, names, [ctx] * len(posts))
+                    for file_path, filename, meta in zip(paths, names, results):
+                        if meta:
+                            self.blog_posts[filename] = meta
+                            self._record(file_path, meta=meta)
+
+            # Sort once, newest first; walking blog_files keeps date ties in directory order
+            # whether a post was rendered or restored from the cache
+            self.sorted_posts = sorted(
+                (self.blog_posts[name] for _, name in self.blog_files if name in self.blog_posts),
+                key=itemgetter('date'), reverse=True)
             
             # Process Blog Index (last, so it has all posts data)
-            if blog_index in all_files:
-                self._process_single_file(os.path.join(self.blog_dir, blog_index), blog_index, section='blog')
+            if blog_index:
+                # The index lists every post, so it is stale whenever any post's metadata changes
+                posts_digest = hashlib.blake2b(json.dumps(self.sorted_posts, ensure_ascii=False).encode('utf-8'), digest_size=16).hexdigest()
+                if self._is_fresh(blog_index, posts_digest):
+                    print("Skipping [blog]: index.html (unchanged)")
+                elif self._process_single_file(blog_index, 'index.html', section='blog'):
+                    self._record(blog_index, posts_digest)
 
         # 2. Process Legal Directory
-        if os.path.exists(self.legal_dir):
-            for filename in os.listdir(self.legal_dir):
-                if filename.endswith('.html'):
-                    file_path = os.path.join(self.legal_dir, filename)
-                    self._process_single_file(file_path, filename, section='legal')
+        for file_path, filename in self.legal_files:
+            if self._is_fresh(file_path):
+                print(f"Skipping [legal]: {filename} (unchanged)")
+            elif self._process_single_file(file_path, filename, section='legal'):
+                self._record(file_path)
         
         # 3. Process Index (Self) - mainly for link cleaning
-        self._process_single_file(self.index_path, 'index.html', section='root')
+        # Reuse the tree load_source already parsed; nav/footer/assets are cached as strings by now
+        if self._is_fresh(self.index_path):
+            print("Skipping [root]: index.html (unchanged)")
+        elif self._process_single_file(self.index_path, 'index.html', section='root', soup=self.source_soup, data=self.source_bytes):
+            self._record(self.index_path)
 
-    def _process_single_file(self, file_path, filename, section='blog'):
+    def _process_single_file(self, file_path, filename, section='blog', soup=None, data=None):
         print(f"Processing [{section}]: {filename}")
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                soup = BeautifulSoup(f.read(), 'html.parser')
-        except Exception as e:
-            print(f"Error reading {file_path}: {e}")
-            return
+        slug = filename[:-len(HTML_SUFFIX)]
+        if soup is None:
+            try:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+                soup = parse_html(data)
+            except Exception as e:
+                print(f"Error reading {file_path}: {e}")
+                return
+
+        # Locate everything the phases below touch in one walk instead of a find() each
+        page = self._index_page(soup)
 
         # Phase 2: Head Reconstruction
-        self._reconstruct_head(soup, filename, section)
+        self._reconstruct_head(soup, slug, section, page)
 
         # Collect metadata for blog posts
         if section == 'blog' and filename != 'index.html':
-            self._extract_blog_metadata(soup, filename)
+            self._extract_blog_metadata(soup, filename, slug, page)
 
         # Phase 3: Content Injection
-        self._inject_layout(soup)
+        self._inject_layout(soup, page)
         
         # Recommendations only for blog posts
         if section == 'blog' and filename != 'index.html':
-            self._inject_recommendations(soup)
+            self._inject_recommendations(soup, filename, page)
         
         # Global: Path Normalization
-        self._clean_links(soup.body)
-        self._fix_anchor_links(soup.body)
-
-        # Save file
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(str(soup))
-
-    def _extract_blog_metadata(self, soup, filename):
-        title = soup.title.string.split('|')[0].strip() if soup.title else filename
+        self._clean_links(page['body'])
+
+        # Save file: encode once and hand the whole buffer to a single write(),
+        # leaving the file (and its mtime) alone when the build is a no-op for it
+        output = soup.encode('utf-8')
+        if output != data:
+            with open(file_path, 'wb') as f:
+                f.write(output)
+        return True
+
+    @staticmethod
+    def _index_page(soup):
+        """Single pass over the tree collecting the first head, title, head metadata, schema,
+        date icon, nav, footer and article; meta/schema are only taken from inside <head>"""
+        page = dict.fromkeys(('head', 'body', 'title', 'description', 'keywords', 'schema',
+                              'calendar', 'nav', 'footer', 'article'))
+        in_head = False
+        for tag in soup.find_all(True):
+            name = tag.name
+            if name == 'head':
+                if page['head'] is None:
+                    page['head'] = tag
+                    in_head = True
+            elif name == 'body':
+                in_head = False
+                if page['body'] is None:
+                    page['body'] = tag
+            elif name == 'title':
+                if page['title'] is None:
+                    page['title'] = tag
+            elif in_head and name == 'meta':
+                key = tag.get('name')
+                if key in ('description', 'keywords') and page[key] is None:
+                    page[key] = tag
+            elif in_head and name == 'script':
+                if tag.get('type') == 'application/ld+json' and page['schema'] is None:
+                    page['schema'] = tag
+            elif name == 'i':
+                if tag.get('data-lucide') == 'calendar' and page['calendar'] is None:
+                    page['calendar'] = tag
+            elif name in ('nav', 'footer', 'article'):
+                if page[name] is None:
+                    page[name] = tag
+        return page
+
+    def _extract_blog_metadata(self, soup, filename, slug, page):
+        # The rebuilt head carries the original title and description over unchanged
+        title_tag = page['title']
+        title = title_tag.string.split('|')[0].strip() if title_tag and title_tag.string else filename
         desc = ""
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
+        meta_desc = page['description']
         if meta_desc: desc = meta_desc.get('content', '')
         
         date = "2026-01-01" # Default
-        # Try to find date in various formats
         # Pattern: <i data-lucide="calendar"></i> 2026-02-07
-        import re
-        text_nodes = soup.find_all(string=re.compile(r'\d{4}-\d{2}-\d{2}'))
-        if text_nodes:
-            date = text_nodes[0].strip()
+        # Search forward from the calendar icon (the date may sit in a following element),
+        # scanning the whole document only when that finds nothing
+        calendar = page['calendar']
+        text_node = calendar.find_next(string=DATE_RE) if calendar else None
+        if text_node is None:
+            text_node = soup.find(string=DATE_RE)
+        if text_node:
+            # Keep just the date, not the whole string it appears in
+            date = DATE_RE.search(text_node).group()
             
-        url = f"https://tkmai.top/blog/{filename.replace('.html', '')}"
+        url = f"https://tkmai.top/blog/{slug}"
         
-        self.blog_posts.append({
+        self.blog_posts[filename] = {
             'title': title,
             'description': desc,
             'date': date,
             'url': url
-        })
+        }
 
-    def _reconstruct_head(self, soup, filename, section):
-        head = soup.find('head')
-        if not head:
-            head = soup.new_tag('head')
-            soup.insert(0, head)
+    def _load_blog_titles(self):
+        """Read every post title once so recommendations need no per-page I/O"""
+        for f_path, f_name in self.blog_files:
+            if f_name == 'index.html':
+                continue
+            try:
+                with open(f_path, 'rb') as f:
+                    data = f.read()
+                match = TITLE_RE.search(data)
+                if match:
+                    title = html.unescape(match.group(1).decode('utf-8', errors='ignore'))
+                else:
+                    # Fall back to a full parse for unusual markup
+                    f_soup = parse_html(data)
+                    title = f_soup.title.string if f_soup.title else None
+                title = title.split('|')[0].strip() if title else f_name
+            except Exception:
+                title = f_name
+            self.blog_titles[f_name] = title
+
+    def _reconstruct_head(self, soup, slug, section, page):
+        old_head = page['head']
         
         # Extract existing metadata to preserve
-        original_title = soup.title.string if soup.title else ""
+        original_title = page['title'].string if page['title'] else ""
         original_desc = ""
         original_keywords = ""
         original_schema = None
         
-        meta_desc = head.find('meta', attrs={'name': 'description'})
+        meta_desc = page['description']
         if meta_desc: original_desc = meta_desc.get('content', '')
         
-        meta_kw = head.find('meta', attrs={'name': 'keywords'})
+        meta_kw = page['keywords']
         if meta_kw: original_keywords = meta_kw.get('content', '')
 
-        script_schema = head.find('script', type='application/ld+json')
+        script_schema = page['schema']
         if script_schema: original_schema = script_schema.string
 
-        # Clear Head
-        head.clear()
-
-        # Group A: Basic Metadata
-        head.append(soup.new_tag('meta', charset='utf-8'))
-        head.append('\n    ')
-        head.append(soup.new_tag('meta', attrs={'name': 'viewport', 'content': 'width=device-width, initial-scale=1.0'}))
-        head.append('\n    ')
-        title_tag = soup.new_tag('title')
-        title_tag.string = original_title
-        head.append(title_tag)
-        head.append('\n\n    ')
-
-        # Group B: SEO Core
-        if original_desc:
-            head.append(soup.new_tag('meta', attrs={'name': 'description', 'content': original_desc}))
-            head.append('\n    ')
-        if original_keywords:
-            head.append(soup.new_tag('meta', attrs={'name': 'keywords', 'content': original_keywords}))
-            head.append('\n    ')
-        
         # Canonical
-        clean_name = filename.replace('.html', '')
         if section == 'root':
             canonical_url = "https://tkmai.top/"
         elif section == 'blog':
-            if clean_name == 'index':
+            if slug == 'index':
                  canonical_url = "https://tkmai.top/blog/"
             else:
-                 canonical_url = f"https://tkmai.top/blog/{clean_name}"
+                 canonical_url = f"https://tkmai.top/blog/{slug}"
         elif section == 'legal':
-             canonical_url = f"https://tkmai.top/legal/{clean_name}"
+             canonical_url = f"https://tkmai.top/legal/{slug}"
         else:
-             canonical_url = f"https://tkmai.top/{clean_name}"
-
-        head.append(soup.new_tag('link', rel='canonical', href=canonical_url))
-        head.append('\n\n    ')
-
-        # Group C: Indexing & Geo
-        head.append(soup.new_tag('meta', attrs={'name': 'robots', 'content': 'index, follow'}))
-        head.append('\n    ')
-        head.append(soup.new_tag('meta', attrs={'http-equiv': 'content-language', 'content': 'zh-cn'}))
-        head.append('\n    ')
-        # Hreflang Matrix
-        head.append(soup.new_tag('link', rel='alternate', hreflang='x-default', href=canonical_url))
-        head.append('\n    ')
-        head.append(soup.new_tag('link', rel='alternate', hreflang='zh', href=canonical_url))
-        head.append('\n    ')
-        head.append(soup.new_tag('link', rel='alternate', hreflang='zh-CN', href=canonical_url))
-        head.append('\n\n    ')
-
-        # Group D: Branding & Resources
-        # Favicons
-        head.append(Comment(" Favicons "))
-        head.append('\n    ')
-        for icon in self.favicons:
-            head.append(icon) # Note: beautifulsoup might move the tag, better to clone if reused, but here we iterate once per file saving
-            head.append('\n    ')
-        
-        head.append(Comment(" Resources "))
-        head.append('\n    ')
-        for res in self.common_styles_scripts:
-            # We need to clone the tag because a tag object can only have one parent
-            import copy
-            head.append(copy.copy(res))
-            head.append('\n    ')
-        head.append('\n')
+             canonical_url = f"https://tkmai.top/{slug}"
 
         # Group E: Structured Data
-        if section == 'blog' and filename == 'index.html':
+        schema_json = None
+        if section == 'blog' and slug == 'index':
             # Generate Custom Schema for Blog Index
             schema = {
                 "@context": "https://schema.org",
@@ -332,51 +541,80 @@ class SiteBuilder:
                 ]
             }
             # Add posts
-            sorted_posts = sorted(self.blog_posts, key=lambda x: x['date'], reverse=True)
-            for i, post in enumerate(sorted_posts):
+            for i, post in enumerate(self.sorted_posts):
                 schema['@graph'][1]['mainEntity']['itemListElement'].append({
                     "@type": "ListItem",
                     "position": i + 1,
                     "url": post['url'],
                     "name": post['title']
                 })
-            
-            schema_tag = soup.new_tag('script', type='application/ld+json')
-            schema_tag.string = json.dumps(schema, indent=2, ensure_ascii=False)
-            head.append(schema_tag)
-            head.append('\n')
-            
+            schema_json = dump_json(schema)
         elif original_schema:
-            schema_tag = soup.new_tag('script', type='application/ld+json')
-            schema_tag.string = original_schema
-            head.append(schema_tag)
-            head.append('\n')
+            schema_json = original_schema
 
-    def _inject_layout(self, soup):
-        import copy
-        
-        # Header
-        # Always use a deep copy of the source nav to avoid modifying the source or moving it
-        new_nav = copy.copy(self.nav_html)
-        
-        old_nav = soup.find('nav')
-        if old_nav:
-            old_nav.replace_with(new_nav)
+        # Render the whole head as one string and parse it once
+        esc = lambda value: html.escape(value, quote=True)
+        canonical = esc(canonical_url)
+        parts = ['<head>']
+
+        # Group A: Basic Metadata
+        parts.append('<meta charset="utf-8"/>\n    ')
+        parts.append('<meta name="viewport" content="width=device-width, initial-scale=1.0"/>\n    ')
+        parts.append(f'<title>{esc(original_title or "")}</title>\n\n    ')
+
+        # Group B: SEO Core
+        if original_desc:
+            parts.append(f'<meta name="description" content="{esc(original_desc)}"/>\n    ')
+        if original_keywords:
+            parts.append(f'<meta name="keywords" content="{esc(original_keywords)}"/>\n    ')
+        parts.append(f'<link rel="canonical" href="{canonical}"/>\n\n    ')
+
+        # Group C: Indexing & Geo
+        parts.append('<meta name="robots" content="index, follow"/>\n    ')
+        parts.append('<meta http-equiv="content-language" content="zh-cn"/>\n    ')
+        # Hreflang Matrix
+        parts.append(f'<link rel="alternate" hreflang="x-default" href="{canonical}"/>\n    ')
+        parts.append(f'<link rel="alternate" hreflang="zh" href="{canonical}"/>\n    ')
+        parts.append(f'<link rel="alternate" hreflang="zh-CN" href="{canonical}"/>\n\n    ')
+
+        # Group D: Branding & Resources (pre-rendered in _extract_assets)
+        parts.append(self.assets_html)
+
+        if schema_json:
+            parts.append(f'<script type="application/ld+json">{schema_json}</script>\n')
+        parts.append('</head>')
+
+        # Whitespace-only strings would otherwise be collapsed to a bare newline
+        new_head = BeautifulSoup(''.join(parts), PARSER, preserve_whitespace_tags=['head', 'pre', 'textarea']).head
+        if old_head:
+            old_head.replace_with(new_head)
         else:
-             if soup.body:
-                soup.body.insert(0, new_nav)
+            soup.insert(0, new_head)
+
+    def _inject_layout(self, soup, page):
+        # Header
+        # Always build a fresh nav from the cached markup to avoid modifying the source or moving it
+        if self.nav_str:
+            new_nav = BeautifulSoup(self.nav_str, PARSER).nav
+            
+            old_nav = page['nav']
+            if old_nav:
+                old_nav.replace_with(new_nav)
+            else:
+                 if page['body']:
+                    page['body'].insert(0, new_nav)
 
         # Footer
-        new_footer = copy.copy(self.footer_html)
-        current_footer = soup.find('footer')
-        if current_footer:
-            current_footer.replace_with(new_footer)
-        else:
-            soup.body.append(new_footer)
+        if self.footer_str:
+            new_footer = BeautifulSoup(self.footer_str, PARSER).footer
+            current_footer = page['footer']
+            if current_footer:
+                current_footer.replace_with(new_footer)
+            else:
+                page['body'].append(new_footer)
 
-    def _inject_recommendations(self, soup, current_filename=None):
-        # Find article
-        article = soup.find('article')
+    def _inject_recommendations(self, soup, current_filename, page):
+        article = page['article']
         if article:
             # Check if recommendations already exist
             existing_rec = article.find('div', class_='recommendations-module')
@@ -394,28 +632,15 @@ class SiteBuilder:
             # Grid
             grid = soup.new_tag('div', attrs={'class': 'grid grid-cols-1 md:grid-cols-2 gap-6'})
             
-            # Scan blog dir for other files
-            other_files = [f for f in os.listdir(self.blog_dir) if f.endswith('.html') and f != 'index.html']
-            
-            # Filter out current file
-            if current_filename:
-                other_files = [f for f in other_files if f != current_filename]
-            
-            import random
-            random.shuffle(other_files)
-            selected = other_files[:4] # Take up to 4
+            # Other posts, from the title cache built at the start of the run
+            # (blog_posts only fills up as posts are processed, so it can't be used here)
+            other_files = [f for f in self.blog_titles if f != current_filename]
+            selected = random.sample(other_files, min(4, len(other_files))) # Take up to 4
             
             for f_name in selected:
-                # We need to open them to get title? Or just use filename?
-                # Opening is better.
-                try:
-                    with open(os.path.join(self.blog_dir, f_name), 'r') as f:
-                        f_soup = BeautifulSoup(f.read(), 'html.parser')
-                        f_title = f_soup.title.string.split('|')[0].strip() if f_soup.title else f_name
-                except:
-                    f_title = f_name
+                f_title = self.blog_titles[f_name]
                 
-                link_url = f"/blog/{f_name.replace('.html', '')}"
+                link_url = f"/blog/{f_name[:-len(HTML_SUFFIX)]}"
                 
                 card = soup.new_tag('a', href=link_url, attrs={'class': 'block glass-card p-6 rounded-xl hover:bg-white/5 transition-all'})
                 card_title = soup.new_tag('h4', attrs={'class': 'font-bold text-white mb-2'})
@@ -433,68 +658,48 @@ class SiteBuilder:
 
     def generate_sitemap(self):
         print("Generating sitemap.xml...")
-        import datetime
         
-        base_url = "https://tkmai.top"
         today = datetime.date.today().isoformat()
         
-        urls = []
+        # Stream each <url> straight to disk instead of building the document in memory
+        sitemap_path = os.path.join(self.root_dir, 'sitemap.xml')
+        count = 0
+        with open(sitemap_path, 'w', encoding='utf-8', buffering=1 << 16) as f:
+            f.write(SITEMAP_HEADER)
+            for loc, changefreq, priority in self._sitemap_urls():
+                f.write(SITEMAP_URL.format(loc=loc, lastmod=today, changefreq=changefreq, priority=priority))
+                count += 1
+            f.write('</urlset>')
+            
+        print(f"Sitemap generated at {sitemap_path} with {count} URLs")
+
+    def _sitemap_urls(self):
+        """Yield (loc, changefreq, priority) for every page in the sitemap"""
+        base_url = "https://tkmai.top"
         
         # 1. Home
-        urls.append({
-            "loc": f"{base_url}/",
-            "lastmod": today,
-            "changefreq": "daily",
-            "priority": "1.0"
-        })
+        yield f"{base_url}/", "daily", "1.0"
         
         # 2. Blog Posts
-        if os.path.exists(self.blog_dir):
-            for filename in os.listdir(self.blog_dir):
-                if filename.endswith('.html') and filename != 'index.html' and filename != '404.html':
-                    slug = filename.replace('.html', '')
-                    urls.append({
-                        "loc": f"{base_url}/blog/{slug}",
-                        "lastmod": today,
-                        "changefreq": "weekly",
-                        "priority": "0.8"
-                    })
+        for _, filename in self.blog_files:
+            if filename != 'index.html' and filename != '404.html':
+                slug = filename[:-len(HTML_SUFFIX)]
+                yield f"{base_url}/blog/{slug}", "weekly", "0.8"
 
         # 3. Legal Pages
-        if os.path.exists(self.legal_dir):
-            for filename in os.listdir(self.legal_dir):
-                if filename.endswith('.html') and filename != '404.html':
-                    slug = filename.replace('.html', '')
-                    urls.append({
-                        "loc": f"{base_url}/legal/{slug}",
-                        "lastmod": today,
-                        "changefreq": "monthly",
-                        "priority": "0.5"
-                    })
-                    
-        # Generate XML
-        sitemap_content = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
-        
-        for url in urls:
-            sitemap_content.append('    <url>')
-            sitemap_content.append(f'        <loc>{url["loc"]}</loc>')
-            sitemap_content.append(f'        <lastmod>{url["lastmod"]}</lastmod>')
-            sitemap_content.append(f'        <changefreq>{url["changefreq"]}</changefreq>')
-            sitemap_content.append(f'        <priority>{url["priority"]}</priority>')
-            sitemap_content.append('    </url>')
-            
-        sitemap_content.append('</urlset>')
-        
-        sitemap_path = os.path.join(self.root_dir, 'sitemap.xml')
-        with open(sitemap_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(sitemap_content))
-            
-        print(f"Sitemap generated at {sitemap_path} with {len(urls)} URLs")
+        for _, filename in self.legal_files:
+            if filename != '404.html':
+                slug = filename[:-len(HTML_SUFFIX)]
+                yield f"{base_url}/legal/{slug}", "monthly", "0.5"
 
     def run(self):
         print("Starting build process...")
         self.load_source()
+        self._scan_dirs()
+        self._load_blog_titles()
+        self._load_cache()
         self.process_all_pages()
+        self._save_cache()
         self.generate_sitemap()
         print("Build complete.")
 
@@ -5,52 +5,53 @@ from datetime import datetime
 BASE_URL = "https://tkmai.top"
 ROOT_DIR = "."
 SITEMAP_FILE = "sitemap.xml"
+# Same date for every entry, so format it once
+LASTMOD = datetime.now().strftime("%Y-%m-%d")
 
 # Function to generate URL entry
 def generate_url_entry(loc, priority="0.8", changefreq="weekly"):
-    lastmod = datetime.now().strftime("%Y-%m-%d")
     return f"""    <url>
         <loc>{loc}</loc>
-        <lastmod>{lastmod}</lastmod>
+        <lastmod>{LASTMOD}</lastmod>
         <changefreq>{changefreq}</changefreq>
         <priority>{priority}</priority>
     </url>"""
 
 # Collect URLs
-urls = []
-
-# 1. Root
-urls.append(generate_url_entry(f"{BASE_URL}/", priority="1.0", changefreq="daily"))
-
-# 2. Blog
-if os.path.exists("blog"):
-    # Blog Index
-    if os.path.exists("blog/index.html"):
-        urls.append(generate_url_entry(f"{BASE_URL}/blog/", priority="0.9", changefreq="daily"))
-    
-    # Blog Posts
-    for filename in os.listdir("blog"):
-        if filename.endswith(".html") and filename != "index.html":
-            # Remove .html extension
-            url_path = filename[:-5]
-            urls.append(generate_url_entry(f"{BASE_URL}/blog/{url_path}", priority="0.8"))
-
-# 3. Legal
-if os.path.exists("legal"):
-    for filename in os.listdir("legal"):
-        if filename.endswith(".html"):
-            # Remove .html extension
-            url_path = filename[:-5]
-            urls.append(generate_url_entry(f"{BASE_URL}/legal/{url_path}", priority="0.5", changefreq="monthly"))
-
-# Generate Content
-sitemap_content = f"""<?xml version="1.0" encoding="UTF-8"?>
+def iter_url_entries():
+    # 1. Root
+    yield generate_url_entry(f"{BASE_URL}/", priority="1.0", changefreq="daily")
+
+    # 2. Blog
+    if os.path.exists("blog"):
+        # Blog Index
+        if os.path.exists("blog/index.html"):
+            yield generate_url_entry(f"{BASE_URL}/blog/", priority="0.9", changefreq="daily")
+        
+        # Blog Posts
+        for filename in os.listdir("blog"):
+            if filename.endswith(".html") and filename != "index.html":
+                # Remove .html extension
+                url_path = filename[:-5]
+                yield generate_url_entry(f"{BASE_URL}/blog/{url_path}", priority="0.8")
+
+    # 3. Legal
+    if os.path.exists("legal"):
+        for filename in os.listdir("legal"):
+            if filename.endswith(".html"):
+                # Remove .html extension
+                url_path = filename[:-5]
+                yield generate_url_entry(f"{BASE_URL}/legal/{url_path}", priority="0.5", changefreq="monthly")
+
+# Write to file, streaming each entry instead of joining them in memory
+count = 0
+with open(SITEMAP_FILE, "w", encoding="utf-8", buffering=1 << 16) as f:
+    f.write("""<?xml version="1.0" encoding="UTF-8"?>
 <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
-{chr(10).join(urls)}
-</urlset>"""
-
-# Write to file
-with open(SITEMAP_FILE, "w", encoding="utf-8") as f:
-    f.write(sitemap_content)
+""")
+    for entry in iter_url_entries():
+        f.write(entry + "\n")
+        count += 1
+    f.write("</urlset>")
 
-print(f"Sitemap updated with {len(urls)} URLs.")
+print(f"Sitemap updated with {count} URLs.")
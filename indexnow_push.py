@@ -1,7 +1,8 @@
-import urllib.request
+import http.client
 import json
+import time
 import xml.etree.ElementTree as ET
-import ssl
+from urllib.parse import urlparse
 
 # Configuration
 SITEMAP_FILE = "sitemap.xml"
@@ -9,21 +10,27 @@ API_KEY = "484713f1a8f647c3a41a395399edd71e"
 INDEXNOW_ENDPOINT = "https://api.indexnow.org/indexnow"
 HOST = "tkmai.top"
 KEY_LOCATION = f"https://{HOST}/{API_KEY}.txt"
+ENDPOINT_HOST = urlparse(INDEXNOW_ENDPOINT).netloc
+ENDPOINT_PATH = urlparse(INDEXNOW_ENDPOINT).path
+BATCH_SIZE = 1000  # IndexNow accepts up to 10,000 URLs per request
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 2
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+URL_TAG = SITEMAP_NS + "url"
+LOC_TAG = SITEMAP_NS + "loc"
 
 def get_urls_from_sitemap(file_path):
     """Parses the sitemap.xml and returns a list of URLs."""
     urls = []
     try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        
-        # Define namespace usually found in sitemaps
-        namespace = {'ns': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
-        
-        for url in root.findall('ns:url', namespace):
-            loc = url.find('ns:loc', namespace)
-            if loc is not None and loc.text:
-                urls.append(loc.text.strip())
+        # Stream the sitemap instead of building the whole tree; only <loc>
+        # in the sitemap namespace counts (not e.g. image:loc)
+        for event, elem in ET.iterparse(file_path, events=('end',)):
+            if elem.tag == LOC_TAG:
+                if elem.text:
+                    urls.append(elem.text.strip())
+            elif elem.tag == URL_TAG:
+                elem.clear()
                 
     except Exception as e:
         print(f"Error parsing sitemap: {e}")
@@ -31,12 +38,11 @@ def get_urls_from_sitemap(file_path):
     
     return urls
 
-def push_to_indexnow(urls):
-    """Pushes the list of URLs to IndexNow."""
-    if not urls:
-        print("No URLs found to push.")
-        return
+def _post_chunk(conn, urls):
+    """POSTs one batch of URLs over an open connection, retrying on 429/5xx.
 
+    Returns (status, body) of the last attempt.
+    """
     data = {
         "host": HOST,
         "key": API_KEY,
@@ -48,28 +54,55 @@ def push_to_indexnow(urls):
     
     headers = {
         "Content-Type": "application/json; charset=utf-8",
-        "Content-Length": len(json_data)
+        "Content-Length": str(len(json_data))
     }
 
-    req = urllib.request.Request(INDEXNOW_ENDPOINT, data=json_data, headers=headers, method="POST")
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            conn.request("POST", ENDPOINT_PATH, body=json_data, headers=headers)
+            response = conn.getresponse()
+            body = response.read().decode('utf-8', errors='replace')
+        except (http.client.HTTPException, OSError):
+            # Connection dropped (e.g. server closed keep-alive); reconnect and retry
+            conn.close()
+            if attempt == MAX_RETRIES:
+                raise
+        else:
+            if response.status != 429 and response.status < 500:
+                return response.status, body
+            if attempt == MAX_RETRIES:
+                return response.status, body
+        time.sleep(BACKOFF_SECONDS * (2 ** attempt))
+
+def push_to_indexnow(urls):
+    """Pushes the list of URLs to IndexNow in batches over one HTTPS connection."""
+    if not urls:
+        print("No URLs found to push.")
+        return
+
+    conn = http.client.HTTPSConnection(ENDPOINT_HOST, timeout=30)
+    pushed = 0
 
     try:
-        # Create a context that doesn't verify certificates if needed (optional, but standard usually works)
-        # context = ssl._create_unverified_context() 
-        with urllib.request.urlopen(req) as response:
-            if response.status == 200 or response.status == 202:
-                print(f"Successfully pushed {len(urls)} URLs to IndexNow.")
-                print("Response code:", response.status)
+        for i in range(0, len(urls), BATCH_SIZE):
+            chunk = urls[i:i + BATCH_SIZE]
+            status, body = _post_chunk(conn, chunk)
+            if status == 200 or status == 202:
+                pushed += len(chunk)
+                print(f"Successfully pushed {len(chunk)} URLs to IndexNow.")
+                print("Response code:", status)
             else:
-                print(f"Failed to push URLs. Status code: {response.status}")
-                print("Response:", response.read().decode('utf-8'))
-    except urllib.error.HTTPError as e:
-        print(f"HTTP Error: {e.code} - {e.reason}")
-        print(e.read().decode('utf-8'))
-    except urllib.error.URLError as e:
-        print(f"URL Error: {e.reason}")
+                print(f"Failed to push URLs. Status code: {status}")
+                print("Response:", body)
+    except (http.client.HTTPException, OSError) as e:
+        print(f"Connection Error: {e}")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+    finally:
+        conn.close()
+
+    if len(urls) > BATCH_SIZE:
+        print(f"Pushed {pushed}/{len(urls)} URLs in total.")
 
 if __name__ == "__main__":
     print(f"Reading URLs from {SITEMAP_FILE}...")